@@ -0,0 +1,137 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+import numpy as np
+
+
+class LRUCache:
+    """Ограниченный по размеру LRU-кэш с необязательным временем жизни записей."""
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Возвращает значение по ключу или None, если записи нет или она устарела."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, value = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Сохраняет значение, вытесняя самую давнюю запись при переполнении."""
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Очищает кэш и сбрасывает счётчики."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Счётчики попаданий и промахов."""
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SemanticCache:
+    """Кэш по близости векторов: значение возвращается для любого вектора,
+    косинусная близость которого к сохранённому не ниже порога.
+
+    Векторы хранятся нормированными в кольцевом буфере, поэтому поиск
+    сводится к одному матрично-векторному произведению. При normalized=True
+    вызывающий код гарантирует, что векторы уже нормированы по L2.
+    Записи старше ttl секунд (если задан) при поиске не учитываются.
+    """
+
+    def __init__(self, capacity: int, threshold: float, normalized: bool = False,
+                 ttl: Optional[float] = None):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.normalized = normalized
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._values: list = [None] * capacity
+        self._stored_at = np.full(capacity, -np.inf)
+        self._count = 0
+        self._next = 0
+
+    def _normalize(self, vector) -> Optional[np.ndarray]:
+        v = np.asarray(vector, dtype=np.float32)
+        if self.normalized:
+            return v
+        norm = np.linalg.norm(v)
+        if not norm:
+            return None
+        return v / norm
+
+    def get(self, vector) -> Optional[Any]:
+        """Возвращает значение для ближайшего сохранённого вектора или None."""
+        v = self._normalize(vector)
+        if v is None or not self._count or v.shape[0] != self._vectors.shape[1]:
+            self.misses += 1
+            return None
+
+        sims = self._vectors[:self._count] @ v
+        if self.ttl is not None:
+            expired = time.monotonic() - self._stored_at[:self._count] > self.ttl
+            sims[expired] = -np.inf
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return self._values[best]
+
+    def put(self, vector, value: Any) -> None:
+        """Сохраняет значение, замещая самую старую запись при заполнении буфера."""
+        v = self._normalize(vector)
+        if v is None:
+            return
+        if self._vectors is None or self._vectors.shape[1] != v.shape[0]:
+            self._vectors = np.empty((self.capacity, v.shape[0]), dtype=np.float32)
+            self._count = self._next = 0
+
+        self._vectors[self._next] = v
+        self._values[self._next] = value
+        self._stored_at[self._next] = time.monotonic()
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self) -> None:
+        """Очищает кэш и сбрасывает счётчики."""
+        self._vectors = None
+        self._values = [None] * self.capacity
+        self._stored_at.fill(-np.inf)
+        self._count = self._next = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Счётчики попаданий и промахов."""
+        return {"size": self._count, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return self._count
@@ -1,7 +1,44 @@
 QDRANT_HOST = "192.168.42.188"
 QDRANT_PORT = 6333
+QDRANT_GRPC_PORT = 6334
 COLLECTION_NAME = "internal_regulations_v2"
 SEARCH_LIMIT = 30  # Лимит документов для проверки ответа
+COLLECTION_WARMUP_INTERVAL = 60  # Как часто прогревать коллекцию Qdrant и соединения к сервисам, секунды
+SEARCH_HNSW_EF = 64  # Ширина поиска по графу HNSW: меньше — быстрее, больше — точнее
+SEARCH_OVERSAMPLING = 2.0  # Запас кандидатов при поиске по квантованным векторам (с последующим пересчётом)
+# Квантование коллекции включается один раз на стороне Qdrant, например бинарное:
+#   client.update_collection(
+#       collection_name=COLLECTION_NAME,
+#       quantization_config=models.BinaryQuantization(
+#           binary=models.BinaryQuantizationConfig(always_ram=True)
+#       )
+#   )
+# Без квантования параметры поиска по квантованным векторам Qdrant игнорирует.
 
 EMBEDDING_SERVICE_ENDPOINT = "http://192.168.45.64:8001/create_embedding" 
+# Пакетный эндпоинт. Включать только после того, как сервис эмбеддингов его поддержит;
+# без него запросы эмбеддингов отправляются сразу, минуя накопление пакетов
+EMBEDDING_BATCH_ENABLED = False
+EMBEDDING_BATCH_ENDPOINT = "http://192.168.45.64:8001/create_embeddings_batch"
+EMBEDDING_BATCH_SIZE = 32  # Максимальное количество текстов в одном запросе к сервису эмбеддингов
+EMBEDDING_BATCH_WAIT = 0.03  # Время накопления пакета, пока сервис занят предыдущим, секунды
 OPENAI_API_ENDPOINT = "http://localhost:8000/generate_answer" 
+HTTP_KEEPALIVE_EXPIRY = 60  # Сколько держать простаивающее соединение к сервисам открытым, секунды
+
+GRADIO_CONCURRENCY_LIMIT = 8  # Сколько вопросов пользователей обрабатывается одновременно
+GRADIO_QUEUE_MAX_SIZE = 64  # Сколько запросов может ждать в очереди, остальным сразу отказ
+
+# Сжатие тел запросов к сервисам. Включать только если сервисы принимают Content-Encoding: gzip
+GZIP_REQUESTS = False
+GZIP_MIN_SIZE = 1024  # Минимальный размер тела запроса для сжатия, байты
+
+EMBEDDING_CACHE_SIZE = 4096  # Количество эмбеддингов вопросов в кэше
+ANSWER_CACHE_SIZE = 1024  # Количество готовых ответов в кэше
+ANSWER_CACHE_TTL = 3600  # Время жизни ответа в кэше, секунды
+SEMANTIC_CACHE_SIZE = 8192  # Количество векторов вопросов в семантическом кэше
+SEMANTIC_CACHE_THRESHOLD = 0.97  # Порог косинусной близости для повторного использования ответа
+RETRIEVAL_CACHE_SIZE = 1024  # Количество результатов поиска в Qdrant в кэше
+RETRIEVAL_CACHE_TTL = 3600  # Время жизни результата поиска в кэше, секунды
+RETRIEVAL_CACHE_SCALE = 64  # Масштаб квантования вектора для ключа кэша поиска: меньше — больше попаданий
+RETRIEVAL_SEMANTIC_CACHE_SIZE = 256  # Количество векторов в семантическом кэше поиска
+RETRIEVAL_SEMANTIC_CACHE_THRESHOLD = 0.95  # Порог косинусной близости для повторного использования контекста
@@ -1,115 +1,586 @@
-import requests
+import asyncio
+import atexit
+import functools
+import gzip
+import hashlib
+import logging
+import logging.handlers
+import operator
+import queue
+import re
+import time
+import httpx
+import numpy as np
+import orjson
 import gradio as gr
 import config
-from qdrant_client import QdrantClient
-from typing import Optional, Tuple
+from cache import LRUCache, SemanticCache
+from qdrant_client import AsyncQdrantClient, models
+from typing import AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+logger = logging.getLogger("rag")
+
+BINARY_CONTENT_TYPE = "application/octet-stream"
+EVENT_STREAM_CONTENT_TYPE = "text/event-stream"
+
+# Нормализация вопроса для ключей кэшей: ё → е, пунктуация заменяется пробелом
+# (точка и запятая внутри чисел вроде «3.1» или «1,5» сохраняются),
+# пробельные символы схлопываются в один пробел
+_QUESTION_KEY_TRANS = str.maketrans({"ё": "е", "Ё": "Е", **dict.fromkeys(";:!?«»\"'()", " ")})
+_QUESTION_KEY_PUNCT = re.compile(r"(?<!\d)[.,]|[.,](?!\d)")
+
+# Извлечение полей из результатов поиска без цикла на уровне байткода
+_get_payload = operator.attrgetter("payload")
+_payload_fields = operator.itemgetter("text", "source_file")
+
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """Направляет журнал через очередь: запись в stdout выполняет отдельный поток,
+    а не обработчики запросов."""
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+@functools.lru_cache(maxsize=1)
+def get_qdrant_client() -> AsyncQdrantClient:
+    """Общий для всего процесса клиент Qdrant (gRPC), создаётся при первом обращении."""
+    return AsyncQdrantClient(
+        host=config.QDRANT_HOST,
+        port=config.QDRANT_PORT,
+        grpc_port=config.QDRANT_GRPC_PORT,
+        prefer_grpc=True,
+        timeout=30,
+        grpc_options={"grpc.max_receive_message_length": 64 << 20}
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_session() -> httpx.AsyncClient:
+    """Общий для всего процесса HTTP-клиент с пулом keep-alive соединений к сервисам."""
+    return httpx.AsyncClient(
+        timeout=120,
+        limits=httpx.Limits(
+            max_connections=64,
+            max_keepalive_connections=32,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY
+        ),
+        transport=httpx.AsyncHTTPTransport(retries=3),
+        headers={"Content-Type": "application/json"}
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_orchestrator() -> "RAGOrchestrator":
+    """Общий для всего процесса оркестратор поверх общих клиентов."""
+    return RAGOrchestrator(qdrant_client=get_qdrant_client(), session=get_session())
+
+
+class _EmbedBatcher:
+    """Объединяет одновременные запросы эмбеддингов в пакеты.
+
+    Пока сервис свободен, текст отправляется сразу вместе со всем, что уже
+    успело накопиться в очереди. Если предыдущий пакет ещё обрабатывается,
+    запросы копятся до max_batch штук или max_wait секунд; при max_wait=0
+    окно накопления не используется.
+    """
+
+    def __init__(self, send: Callable[[list[str]], Awaitable[list[Optional[np.ndarray]]]],
+                 max_batch: int, max_wait: float):
+        self._send = send
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: set[asyncio.Task] = set()
+
+    async def submit(self, text: str) -> Optional[np.ndarray]:
+        """Ставит текст в очередь и ждёт его эмбеддинг."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            if self._in_flight and self._max_wait > 0:
+                deadline = loop.time() + self._max_wait
+                while len(batch) < self._max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            else:
+                await asyncio.sleep(0)
+            while len(batch) < self._max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            task = asyncio.create_task(self._flush(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _flush(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        try:
+            embeddings = await self._send([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
 
 class RAGOrchestrator:
-    def __init__(self, qdrant_client: QdrantClient):
+    def __init__(self, qdrant_client: AsyncQdrantClient, session: Optional[httpx.AsyncClient] = None):
         self.qdrant_client = qdrant_client
-        print("✅ Клиент-оркестратор готов к работе.")
-
-    def get_embedding(self, text: str) -> Optional[list[float]]:
-        """Получает эмбеддинг, обращаясь к сервису на GPU-машине."""
-        return self._make_api_request(
-            config.EMBEDDING_SERVICE_ENDPOINT, 
-            {"text": text}, 
-            "embedding", 
-            "сервису эмбеддингов",
-            60
+        self.aclient = session or get_session()
+        self._embedding_cache = LRUCache(config.EMBEDDING_CACHE_SIZE)
+        self._answer_cache = LRUCache(config.ANSWER_CACHE_SIZE, ttl=config.ANSWER_CACHE_TTL)
+        self._semantic_cache = SemanticCache(
+            config.SEMANTIC_CACHE_SIZE, config.SEMANTIC_CACHE_THRESHOLD, normalized=True,
+            ttl=config.ANSWER_CACHE_TTL
         )
-
-    def query_llm(self, question: str, context: str) -> str:
-        """Обращается к LLM-сервису."""
-        result = self._make_api_request(
-            config.OPENAI_API_ENDPOINT,
-            {"question": question, "context": context},
-            "answer",
-            "LLM-сервису",
-            120
+        self._retrieval_cache = LRUCache(config.RETRIEVAL_CACHE_SIZE, ttl=config.RETRIEVAL_CACHE_TTL)
+        self._retrieval_semantic_cache = SemanticCache(
+            config.RETRIEVAL_SEMANTIC_CACHE_SIZE, config.RETRIEVAL_SEMANTIC_CACHE_THRESHOLD, normalized=True,
+            ttl=config.RETRIEVAL_CACHE_TTL
         )
-        return result or "Сервер вернул пустой ответ."
-    
-    def _make_api_request(self, endpoint: str, payload: dict, response_key: str, service_name: str, timeout: int):
-        """Общий метод для выполнения API-запросов."""
+        # Без пакетного эндпоинта ждать накопления пакета бессмысленно
+        batch_wait = config.EMBEDDING_BATCH_WAIT if config.EMBEDDING_BATCH_ENABLED else 0
+        self._embedding_batcher = _EmbedBatcher(
+            self._fetch_embeddings, config.EMBEDDING_BATCH_SIZE, batch_wait
+        )
+        self._background_tasks: set[asyncio.Task] = set()
+        self._collection_warmed_at = float("-inf")
+        self._services_warmed_at = float("-inf")
+        self._collection_task: Optional[asyncio.Task] = None
+        self._collection_info: Optional[models.CollectionInfo] = None
+        self._vector_name: Optional[str] = None
+        logger.info("✅ Клиент-оркестратор готов к работе.")
+
+    @property
+    def _cache_stats(self) -> dict:
+        """Статистика попаданий и промахов кэшей."""
+        return {
+            "embedding": self._embedding_cache.stats(),
+            "answer": self._answer_cache.stats(),
+            "semantic": self._semantic_cache.stats(),
+            "retrieval": self._retrieval_cache.stats(),
+            "retrieval_semantic": self._retrieval_semantic_cache.stats()
+        }
+
+    @staticmethod
+    def _normalize_question(text: str) -> str:
+        """Приводит вопрос к виду, используемому в качестве ключа кэша."""
+        text = _QUESTION_KEY_PUNCT.sub(" ", text.translate(_QUESTION_KEY_TRANS))
+        return " ".join(text.split()).casefold()
+
+    async def get_embedding(self, text: str) -> Optional[np.ndarray]:
+        """Получает эмбеддинг (float32, только для чтения), обращаясь к сервису на GPU-машине."""
+        key = self._normalize_question(text)
+        embedding = self._embedding_cache.get(key)
+        if embedding is not None:
+            return embedding
+
+        if config.EMBEDDING_BATCH_ENABLED:
+            embedding = await self._embedding_batcher.submit(text)
+        else:
+            embedding = (await self._fetch_embeddings([text]))[0]
+        if embedding is not None:
+            self._embedding_cache.put(key, embedding)
+        return embedding
+
+    async def clear_embedding_cache(self) -> str:
+        """Очищает кэш эмбеддингов вопросов.
+
+        Обработчик асинхронный, чтобы Gradio вызывал его в цикле событий, а не
+        в пуле потоков: LRUCache не потокобезопасен.
+        """
+        size = len(self._embedding_cache)
+        self._embedding_cache.clear()
+        self._log_completion(f"кэш эмбеддингов очищен ({size} записей)")
+        return f"Кэш эмбеддингов очищен, удалено записей: {size}."
+
+    async def _fetch_embeddings(self, texts: list[str]) -> list[Optional[np.ndarray]]:
+        """Получает эмбеддинги для пакета текстов одним запросом к сервису.
+
+        Без пакетного эндпоинта (EMBEDDING_BATCH_ENABLED выключен или запрос
+        не удался) тексты отправляются на /create_embedding параллельно.
+        """
+        if len(texts) == 1:
+            raw = await self._make_api_request(
+                config.EMBEDDING_SERVICE_ENDPOINT, 
+                {"text": texts[0]}, 
+                "embedding", 
+                "сервису эмбеддингов",
+                60,
+                accept_binary=True
+            )
+            return self._split_embeddings(raw, 1, batched=False)
+
+        if config.EMBEDDING_BATCH_ENABLED:
+            raw = await self._make_api_request(
+                config.EMBEDDING_BATCH_ENDPOINT,
+                {"texts": texts},
+                "embeddings",
+                "сервису эмбеддингов",
+                60,
+                accept_binary=True
+            )
+            if raw is not None:
+                return self._split_embeddings(raw, len(texts), batched=True)
+            logger.warning("Пакетный запрос эмбеддингов не удался, запрашиваю по одному тексту")
+
+        results = await asyncio.gather(*(self._fetch_embeddings([text]) for text in texts))
+        return [embeddings[0] for embeddings in results]
+
+    @staticmethod
+    def _split_embeddings(raw, count: int, batched: bool) -> list[Optional[np.ndarray]]:
+        """Раскладывает ответ сервиса эмбеддингов (JSON или бинарный) по текстам пакета.
+
+        Векторы один раз приводятся к непрерывным массивам float32, нормируются
+        по L2 (дальше все кэши считают косинус простым скалярным произведением)
+        и помечаются только для чтения, так как разделяются кэшами.
+        Векторы с нулевой нормой считаются ошибкой сервиса.
+        """
+        if raw is None:
+            return [None] * count
+        if not isinstance(raw, np.ndarray):
+            try:
+                if batched and len(raw) != count:
+                    return [None] * count
+                raw = np.asarray(raw if batched else [raw], dtype=np.float32)
+            except (TypeError, ValueError) as e:
+                logger.error("Некорректный эмбеддинг от сервиса эмбеддингов: %s", e)
+                return [None] * count
+        if not raw.size or raw.size % count:
+            return [None] * count
+        matrix = raw.reshape(count, -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        valid = norms[:, 0] > 0
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        matrix.flags.writeable = False
+        return [row if ok else None for row, ok in zip(matrix, valid)]
+
+    async def stream_llm(self, question: str, context: str) -> AsyncIterator[str]:
+        """Обращается к LLM-сервису и отдаёт ответ по частям.
+
+        Если сервис отвечает потоком Server-Sent Events, каждое событие
+        содержит JSON с очередным фрагментом в поле "answer". Обычный JSON-ответ
+        отдаётся одним фрагментом. Ошибки HTTP (httpx.HTTPError) и некорректные
+        ответы (ValueError) пробрасываются вызывающему.
+        """
+        body, headers = self._encode_payload({"question": question, "context": context})
+        headers["Accept"] = f"{EVENT_STREAM_CONTENT_TYPE}, application/json;q=0.9"
+        async with self.aclient.stream(
+            "POST", config.OPENAI_API_ENDPOINT, content=body, headers=headers, timeout=120
+        ) as response:
+            response.raise_for_status()
+            if not response.headers.get("Content-Type", "").startswith(EVENT_STREAM_CONTENT_TYPE):
+                yield self._parse_answer_fragment(await response.aread())
+                return
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                if data:
+                    yield self._parse_answer_fragment(data)
+
+    @staticmethod
+    def _parse_answer_fragment(raw) -> str:
+        """Достаёт поле "answer" из JSON-объекта LLM-сервиса.
+
+        Ответ другой структуры считается ошибкой декодирования (ValueError).
+        """
+        data = orjson.loads(raw)
+        if not isinstance(data, dict):
+            raise ValueError(f"ожидался JSON-объект, получено: {type(data).__name__}")
+        answer = data.get("answer") or ""
+        if not isinstance(answer, str):
+            raise ValueError(f"поле answer должно быть строкой, получено: {type(answer).__name__}")
+        return answer
+
+    @staticmethod
+    def _encode_payload(payload: dict) -> Tuple[bytes, dict]:
+        """Сериализует тело запроса в UTF-8 JSON (массивы numpy — без .tolist()),
+        при необходимости сжимая его gzip."""
+        body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+        if config.GZIP_REQUESTS and len(body) >= config.GZIP_MIN_SIZE:
+            return gzip.compress(body, compresslevel=1), {"Content-Encoding": "gzip"}
+        return body, {}
+
+    async def _make_api_request(self, endpoint: str, payload: dict, response_key: str, service_name: str, timeout: int,
+                                accept_binary: bool = False):
+        """Общий метод для выполнения API-запросов. При любой ошибке возвращает None.
+
+        При accept_binary сервис может вернуть вектор(ы) упакованными float16
+        (application/octet-stream) вместо JSON; результат тогда — массив float32.
+        """
+        body, headers = self._encode_payload(payload)
+        if accept_binary:
+            headers["Accept"] = f"{BINARY_CONTENT_TYPE}, application/json;q=0.9"
         try:
-            response = requests.post(endpoint, json=payload, timeout=timeout)
+            response = await self.aclient.post(endpoint, content=body, headers=headers, timeout=timeout)
             response.raise_for_status()
-            return response.json().get(response_key)
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Ошибка при обращении к {service_name}: {e}"
-            print(error_msg)
-            return None if response_key == "embedding" else error_msg
-
-    def process_query(self, question: str) -> Tuple[str, str]:
-        """Полный цикл обработки вопроса от пользователя."""
+            if accept_binary and response.headers.get("Content-Type", "").startswith(BINARY_CONTENT_TYPE):
+                return np.frombuffer(response.content, dtype=np.float16).astype(np.float32)
+            data = orjson.loads(response.content)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error("Ошибка при обращении к %s: %s", service_name, e)
+            return None
+
+        if not isinstance(data, dict):
+            logger.error("Некорректный ответ от %s: ожидался JSON-объект", service_name)
+            return None
+        return data.get(response_key)
+
+    async def process_query_async(self, question: str) -> AsyncIterator[Tuple[str, str]]:
+        """Полный цикл обработки вопроса от пользователя.
+
+        Источники отдаются в интерфейс сразу после поиска, ответ LLM — по мере генерации.
+        """
         if not question:
-            return "Пожалуйста, введите вопрос.", ""
+            yield "Пожалуйста, введите вопрос.", ""
+            return
+
+        cache_key = self._normalize_question(question)
+        cached = self._answer_cache.get(cache_key)
+        if cached is not None:
+            self._log_completion("ответ взят из кэша")
+            yield cached
+            return
 
         self._log_step(1, f"Получение эмбеддинга для вопроса: '{question[:30]}...'")
-        question_embedding = self.get_embedding(question)
-        if not question_embedding:
-            return "Не удалось получить вектор для вопроса. Проверьте сервис эмбеддингов.", ""
+        self._start_collection_warmup()
+        question_embedding = await self.get_embedding(question)
+        if question_embedding is None:
+            yield "Не удалось получить вектор для вопроса. Проверьте сервис эмбеддингов.", ""
+            return
         self._log_completion("эмбеддинг получен")
 
+        cached = self._semantic_cache.get(question_embedding)
+        if cached is not None:
+            self._log_completion("ответ на близкий по смыслу вопрос взят из кэша")
+            yield cached
+            return
+
         self._log_step(2, "Поиск релевантного контекста в Qdrant...")
-        context, sources = self._search_and_prepare_context(question_embedding)
+        context, sources = await self._search_and_prepare_context(question_embedding)
         if not context:
-            return "В базе знаний не найдено релевантного контекста.", ""
+            yield "В базе знаний не найдено релевантного контекста.", ""
+            return
+        sources_text = f"Источники: {', '.join(sources)}"
+        # Источники известны до начала генерации — показываем их сразу
+        yield "Формирую ответ...", sources_text
 
         self._log_step(3, "Отправка запроса на LLM-сервис...")
-        answer = self.query_llm(question, context)
+        answer = ""
+        try:
+            async for fragment in self.stream_llm(question, context):
+                if fragment:
+                    answer += fragment
+                    yield answer, sources_text
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error("Ошибка при обращении к LLM-сервису: %s", e)
+            yield "Ошибка при обращении к LLM-сервису. Попробуйте повторить запрос позже.", ""
+            return
         self._log_completion("ответ от LLM получен")
 
-        return answer, f"Источники: {', '.join(sources)}"
-    
-    def _search_and_prepare_context(self, question_embedding: list[float]) -> Tuple[str, list[str]]:
+        if not answer:
+            yield "Сервер вернул пустой ответ.", sources_text
+            return
+
+        result = answer, sources_text
+        self._answer_cache.put(cache_key, result)
+        self._semantic_cache.put(question_embedding, result)
+
+    async def preconnect(self) -> None:
+        """Заранее открывает соединения к сервисам эмбеддингов, LLM и Qdrant.
+
+        Вызывается при открытии страницы, пока пользователь вводит вопрос,
+        чтобы первый запрос не тратил время на установку соединений. Соединения
+        остаются в пуле keep-alive; код ответа /health не важен.
+        """
+        self._start_collection_warmup()
+        if time.monotonic() - self._services_warmed_at < config.COLLECTION_WARMUP_INTERVAL:
+            return
+        self._services_warmed_at = time.monotonic()
+        for endpoint in (config.EMBEDDING_SERVICE_ENDPOINT, config.OPENAI_API_ENDPOINT):
+            task = asyncio.create_task(self._ping_service(endpoint.rsplit("/", 1)[0] + "/health"))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+    async def _ping_service(self, url: str) -> None:
+        try:
+            await self.aclient.get(url, timeout=5)
+        except httpx.HTTPError as e:
+            logger.warning("Не удалось установить соединение с %s: %s", url, e)
+
+    def _start_collection_warmup(self) -> None:
+        """Параллельно с получением эмбеддинга обращается к коллекции Qdrant,
+        чтобы поиск не ждал установки соединения, и обновляет сохранённые
+        метаданные коллекции. Выполняется не чаще раза в COLLECTION_WARMUP_INTERVAL секунд.
+        """
+        now = time.monotonic()
+        if now - self._collection_warmed_at < config.COLLECTION_WARMUP_INTERVAL:
+            return
+        self._collection_warmed_at = now
+        task = asyncio.create_task(self._refresh_collection_info())
+        self._collection_task = task
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _refresh_collection_info(self) -> None:
+        """Загружает метаданные коллекции и определяет имя вектора для поиска."""
+        try:
+            info = await self.qdrant_client.get_collection(config.COLLECTION_NAME)
+            vectors = info.config.params.vectors
+        except Exception as e:
+            logger.warning("Не удалось прогреть коллекцию Qdrant: %s", e)
+            return
+
+        self._collection_info = info
+        if isinstance(vectors, dict) and len(vectors) == 1:
+            self._vector_name = next(iter(vectors))
+        else:
+            self._vector_name = None
+
+    async def _query_vector(self, question_embedding: np.ndarray):
+        """Вектор запроса с учётом схемы коллекции (именованный или единственный).
+
+        До первой загрузки метаданных дожидается запущенного прогрева.
+        """
+        if self._collection_info is None and self._collection_task is not None:
+            await self._collection_task
+        if self._vector_name is None:
+            return question_embedding
+        return models.NamedVector(name=self._vector_name, vector=question_embedding.tolist())
+
+    async def _search_and_prepare_context(self, question_embedding: np.ndarray) -> Tuple[str, list[str]]:
         """Поиск контекста в Qdrant и подготовка источников."""
-        search_results = self.qdrant_client.search(
+        cache_key = self._embedding_key(question_embedding)
+        cached = self._retrieval_cache.get(cache_key)
+        if cached is not None:
+            self._log_completion("контекст взят из кэша поиска")
+            return cached
+
+        cached = self._retrieval_semantic_cache.get(question_embedding)
+        if cached is not None:
+            self._log_completion("контекст для близкого по смыслу вопроса взят из кэша поиска")
+            return cached
+
+        search_results = await self.qdrant_client.search(
             collection_name=config.COLLECTION_NAME,
-            query_vector=question_embedding,
+            query_vector=await self._query_vector(question_embedding),
             limit=config.SEARCH_LIMIT,
-            with_payload=True
+            search_params=models.SearchParams(
+                hnsw_ef=config.SEARCH_HNSW_EF,
+                exact=False,
+                quantization=models.QuantizationSearchParams(
+                    ignore=False,
+                    rescore=True,
+                    oversampling=config.SEARCH_OVERSAMPLING
+                )
+            ),
+            with_payload=["text", "source_file"],
+            with_vectors=False
         )
         
         if not search_results:
             return "", []
         
-        context = "\n---\n".join([result.payload['text'] for result in search_results])
-        sources = sorted(list(set([result.payload['source_file'] for result in search_results])))
+        texts, files = zip(*map(_payload_fields, map(_get_payload, search_results)))
+        context = "\n---\n".join(texts)
+        # Источники — без повторов, в порядке релевантности найденных фрагментов
+        sources = list(dict.fromkeys(files))
         self._log_completion(f"найдено {len(sources)} источников")
+        self._retrieval_cache.put(cache_key, (context, sources))
+        self._retrieval_semantic_cache.put(question_embedding, (context, sources))
         return context, sources
+
+    @staticmethod
+    def _embedding_key(embedding: np.ndarray) -> bytes:
+        """Ключ кэша поиска: хэш грубо квантованного (нормированного) вектора.
+
+        Близкие векторы после квантования в int8 совпадают и дают один ключ.
+        """
+        quantized = np.round(embedding * config.RETRIEVAL_CACHE_SCALE).astype(np.int8)
+        return hashlib.blake2b(quantized.tobytes(), digest_size=16).digest()
     
     def _log_step(self, step_num: int, message: str) -> None:
         """Логирование шага обработки."""
-        print(f"\n{step_num}. {message}")
+        logger.info("%d. %s", step_num, message)
     
     def _log_completion(self, message: str) -> None:
         """Логирование завершения шага."""
-        print(f"   ...{message}.")
+        logger.info("   ...%s.", message)
 
 # --- Инициализация и запуск Gradio ---
+def build_interface(orchestrator: RAGOrchestrator) -> gr.Blocks:
+    """Собирает интерфейс Gradio поверх оркестратора."""
+    with gr.Blocks(title="RAG-система для ВНД Атомстройкомплекс") as iface:
+        gr.Markdown(
+            "# RAG-система для ВНД Атомстройкомплекс\n"
+            "Введите свой вопрос. Система наидет релевантные документы и сгенерирует ответ."
+        )
+        question = gr.Textbox(lines=3, label="Ваш вопрос к базе знаний")
+        submit_btn = gr.Button("Отправить", variant="primary")
+        answer = gr.Textbox(label="Ответ")
+        sources = gr.Textbox(label="Найденные источники")
+
+        with gr.Accordion("Администрирование", open=False):
+            clear_cache_btn = gr.Button("Очистить кэш эмбеддингов")
+            admin_status = gr.Textbox(label="Статус", interactive=False)
+
+        submit_btn.click(
+            fn=orchestrator.process_query_async,
+            inputs=question,
+            outputs=[answer, sources],
+            concurrency_limit=config.GRADIO_CONCURRENCY_LIMIT,
+            concurrency_id="rag"
+        )
+        clear_cache_btn.click(fn=orchestrator.clear_embedding_cache, outputs=admin_status)
+        iface.load(fn=orchestrator.preconnect, show_progress="hidden")
+
+    iface.queue(
+        default_concurrency_limit=config.GRADIO_CONCURRENCY_LIMIT,
+        max_size=config.GRADIO_QUEUE_MAX_SIZE
+    )
+    return iface
+
+
 if __name__ == "__main__":
+    setup_logging()
     try:
-        print("Подключение к Qdrant...")
-        q_client = QdrantClient(host=config.QDRANT_HOST, port=config.QDRANT_PORT)
-        
-        orchestrator = RAGOrchestrator(qdrant_client=q_client)
-
-        print("\nЗапуск интерфейса Gradio...")
-        iface = gr.Interface(
-            fn=orchestrator.process_query,
-            inputs=gr.Textbox(lines=3, label="Ваш вопрос к базе знаний"),
-            outputs=[
-                gr.Textbox(label="Ответ"),
-                gr.Textbox(label="Найденные источники")
-            ],
-            title="RAG-система для ВНД Атомстройкомплекс ",
-            description="Введите свой вопрос. Система наидет релевантные документы и сгенерирует ответ."
-        )
+        logger.info("Подключение к Qdrant...")
+        orchestrator = get_orchestrator()
+
+        logger.info("Запуск интерфейса Gradio...")
+        iface = build_interface(orchestrator)
         
         # Запускаем Gradio на порту 80, чтобы был доступен по IP машины
         iface.launch(server_name="0.0.0.0")
 
     except Exception as e:
-        print(f"❌ КРИТИЧЕСКАЯ ОШИБКА ПРИ ЗАПУСКЕ ОРКЕСТРАТОРА: {e}")
+        logger.critical("❌ КРИТИЧЕСКАЯ ОШИБКА ПРИ ЗАПУСКЕ ОРКЕСТРАТОРА: %s", e)